@@ -1,391 +1,925 @@
-import os
-import json
-from dotenv import load_dotenv
-import random 
-
-# Import the Google GenAI library
-from google import genai
-from google.genai.errors import APIError
-
-# Load environment variables (API Key)
-load_dotenv()
-
-# --- CONFIGURATION & CLIENT INITIALIZATION ---
-
-try:
-    # Initialize the real Gemini Client
-    GEMINI_CLIENT = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-except Exception:
-    print("FATAL ERROR: Could not initialize Gemini Client. Check your .env file and API key.")
-    class MockGeminiClient:
-        def generate_content(self, model, contents, config=None):
-            return type('MockResponse', (object,), {'text': "API ERROR: Client failed to initialize. Cannot answer."})
-    GEMINI_CLIENT = MockGeminiClient()
-
-
-# --- GLOBAL DATA STRUCTURE & STATE ---
-SEARCHABLE_DOCUMENTS = []
-SESSION_STATE = {}
-
-
-# --- NEW STATE & LANGUAGE SETUP ---
-
-def get_language_preference():
-    """Prompts the user for language choice and sets the session state."""
-    
-    print("\n--- Language Selection ---")
-    while True:
-        choice = input("Please choose your preferred language / अपनी पसंदीदा भाषा चुनें:\n[E] English\n[H] Hindi\n> ").lower().strip()
-        
-        if choice == 'e':
-            SESSION_STATE['language'] = 'english'
-            print("---------------------------------------------")
-            print("Language set to English. Welcome! Ask me any financial term, saving tip, or scam alert. (Type 'quit' to exit)")
-            break
-        elif choice == 'h':
-            SESSION_STATE['language'] = 'hindi'
-            print("---------------------------------------------")
-            print("भाषा हिंदी पर सेट कर दी गई है। स्वागत है! मुझसे कोई भी वित्तीय शब्द, बचत सुझाव या घोटाले की चेतावनी के बारे में पूछें। (बाहर निकलने के लिए 'quit' टाइप करें)")
-            break
-        else:
-            print("Invalid choice. Please enter 'E' or 'H'. / अमान्य विकल्प। कृपया 'E' या 'H' दर्ज करें।")
-
-# --- UTILITY FUNCTIONS ---
-# (Removed detect_language as it's no longer needed)
-
-def is_query_financial(user_question):
-    """
-    Simple heuristic to guess if a query is related to finance, business, or economics.
-    """
-    financial_keywords = [
-        "account", "asset", "bank", "bond", "business", "capital", "cash", "credit", 
-        "debt", "economy", "finance", "fund", "insurance", "invest", "loan", "market", 
-        "money", "mortgage", "pay", "rate", "risk", "stock", "tax", "wealth", 
-        "apr", "kyc", "cdo", "reit", "roth", "ira", "401k", "liability", "income", "expense", "investing", "crypto", 
-        "scam", "scams", "tip", "tips", "define", "what is", "mlm", "blockchain",
-        "nifty", "sip", "ipo", "eps", "pe", "gdp", "cpi", "sensex", "nifty 50"
-    ]
-    query_words = user_question.lower().split()
-    # Check both English and common Hindi keywords to cover all cases
-    return any(word in query_words for word in financial_keywords) or any(k in user_question for k in ["बचत", "निवेश", "ऋण", "घोटाला", "वित्तीय", "टिप"])
-
-
-def clean_gemini_output(text, query):
-    """Strips common LLM preambles to ensure only the core definition is returned."""
-    query_lower = query.lower()
-    cleaned_text = text
-    preambles_en = [f"{query_lower} stands for", f"{query_lower} is", "it stands for", "stands for", "the definition is", "refers to", "is the"]
-    preambles_hi = ["इसका मतलब है", "परिभाषा यह है", "को संदर्भित करता है", "है"]
-    
-    # Check English preambles
-    for preamble in preambles_en:
-        if cleaned_text.lower().startswith(preamble):
-            start_index = cleaned_text.lower().find(preamble) + len(preamble)
-            cleaned_text = cleaned_text[start_index:].strip(":,.- ")
-            break
-            
-    # Check Hindi preambles
-    for preamble in preambles_hi:
-        if cleaned_text.strip().startswith(preamble):
-            start_index = cleaned_text.strip().find(preamble) + len(preamble)
-            cleaned_text = cleaned_text[start_index:].strip(":,.- ")
-            break
-            
-    return cleaned_text
-
-def load_and_index_data(file_path="financial_data.json"):
-    """Loads the JSON and flattens it into the SEARCHABLE_DOCUMENTS list, capturing both English and Hindi."""
-    global SEARCHABLE_DOCUMENTS
-    try:
-        # Use utf-8 encoding for Hindi support
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    except FileNotFoundError:
-        print(f"Error: {file_path} not found. Please ensure it exists.")
-        return
-
-    # 1. Process Financial Terms (Definitions)
-    for item in data.get('financial_literacy_terms', []):
-        SEARCHABLE_DOCUMENTS.append({
-            "doc_type": "Definition",
-            "search_key": item['question'],
-            "content": item['response'],
-            "content_hindi": item.get('response_hindi', 'Translation not available.'),
-            "keywords": [item['question'].lower()] + [k.lower() for k in item.get('keywords', [])]
-        })
-
-    # 2. Process Saving Tips
-    for item in data.get('financial_advice', {}).get('saving_tips', []):
-        keywords_from_detail = [word.lower() for word in item['detail'].split() if len(word) > 3]
-        SEARCHABLE_DOCUMENTS.append({
-            "doc_type": "Saving Tip",
-            "search_key": item['tip'],
-            "content": f"Tip: {item['detail']}",
-            "content_hindi": f"सुझाव: {item.get('detail_hindi', 'अनुवाद उपलब्ध नहीं है।')}",
-            "keywords": [item['tip'].lower()] + keywords_from_detail
-        })
-        
-    # 3. Process Scam Alerts
-    for item in data.get('financial_advice', {}).get('scam_alerts', []):
-        scam_content = f"Warning: {item['warning_sign']} | Prevention: {item['prevention_tip']}"
-        scam_content_hindi = f"चेतावनी: {item.get('warning_sign_hindi', 'अनुवाद उपलब्ध नहीं है।')} | रोकथाम: {item.get('prevention_tip_hindi', 'अनुवाद उपलब्ध नहीं है।')}"
-        keywords_from_scam = [word.lower() for word in scam_content.split() if len(word) > 3]
-        SEARCHABLE_DOCUMENTS.append({
-            "doc_type": "Scam Alert",
-            "search_key": item['scam_name'],
-            "content": scam_content,
-            "content_hindi": scam_content_hindi,
-            "keywords": [item['scam_name'].lower()] + keywords_from_scam
-        })
-    
-    print(f"Loaded {len(SEARCHABLE_DOCUMENTS)} searchable documents.")
-
-
-# --- MULTI-RETRIEVAL FUNCTIONS ---
-
-def retrieve_related_info(doc_type, lang):
-    """Retrieves a single, random document of the specified type in the requested language."""
-    docs = [doc for doc in SEARCHABLE_DOCUMENTS if doc['doc_type'] == doc_type]
-    if docs:
-        doc = random.choice(docs)
-        # Select the content key based on the requested language
-        content_key = 'content_hindi' if lang == 'hindi' else 'content'
-        
-        # Return a custom result dict that ensures we get the right language
-        return {
-            "search_key": doc['search_key'],
-            "doc_type": doc['doc_type'],
-            "content": doc.get(content_key, doc['content']) 
-        }
-    return None
-
-def search_multiple_tips(count, lang):
-    """Retrieves a specified number of unique Saving Tips in the requested language."""
-    tips = [doc for doc in SEARCHABLE_DOCUMENTS if doc['doc_type'] == "Saving Tip"]
-    num_to_return = min(count, len(tips))
-    selected_tips = random.sample(tips, num_to_return)
-    
-    response = ""
-    if lang == "hindi":
-        response = f"यहाँ {num_to_return} लोकप्रिय बचत सुझाव दिए गए हैं:\n\n"
-        content_key = 'content_hindi'
-    else:
-        response = f"Here are {num_to_return} popular Saving Tips:\n\n"
-        content_key = 'content'
-
-    for i, doc in enumerate(selected_tips):
-        response += f"{i+1}. **{doc['search_key']} ({doc['doc_type']}):**\n"
-        response += f"   {doc.get(content_key, doc['content'])}\n\n"
-        
-    return response.strip()
-
-
-# --- RAG RETRIEVAL AND FALLBACK ---
-
-def search_custom_data(user_query):
-    """
-    Searches the local data structure for a matching answer. Returns the raw document dict.
-    """
-    query = user_query.lower()
-    SCORE_THRESHOLD = 0.5 
-    top_matches = []
-    highest_score = 0
-    
-    for doc in SEARCHABLE_DOCUMENTS:
-        score = 0
-        
-        if "scam" in query and doc['doc_type'] == "Scam Alert":
-            score += 1.5 
-        elif ("tip" in query or "save" in query) and doc['doc_type'] == "Saving Tip":
-            score += 1.0 
-        elif ("what is" in query or "define" in query or "term" in query) and doc['doc_type'] == "Definition":
-            score += 0.5 
-            
-        if doc['search_key'].lower() in query:
-            score += 1.0 
-            
-        for keyword in doc.get('keywords', []):
-            if keyword in query:
-                score += 0.5 
-                
-        if query in doc['content'].lower():
-             score += 0.4
-        
-        if score > highest_score:
-            highest_score = score
-            top_matches = [doc]
-        elif score == highest_score and score >= SCORE_THRESHOLD:
-            top_matches.append(doc)
-
-    if highest_score >= SCORE_THRESHOLD and top_matches:
-        return random.choice(top_matches) 
-    else:
-        return None 
-
-def call_gemini_api_fallback(user_question, lang):
-    """Calls the Gemini API if local search fails, requesting the definition in the correct language."""
-    
-    if lang == "hindi":
-         system_instruction = (
-            "You are an expert, helpful financial assistant. The user is asking for a definition of a financial term. "
-            "Respond with a clean, concise definition or explanation in **Hindi (Devanagari script)**. "
-            "Do not include any introductory phrases like 'इसका मतलब है' or 'परिभाषा यह है'."
-        )
-    else:
-        system_instruction = (
-            "You are an expert, helpful financial assistant. The user is asking for a definition of a financial term or acronym. "
-            "Respond with ONLY the clean, concise definition or explanation, without any introductory phrases like 'It stands for...' or 'The definition is...'. "
-            "Start your response directly with the term's meaning."
-        )
-
-    try:
-        response = GEMINI_CLIENT.models.generate_content(
-            model="gemini-2.5-flash", 
-            contents=[user_question],
-            config=genai.types.GenerateContentConfig(system_instruction=system_instruction)
-        )
-        gemini_raw_text = response.text
-        return clean_gemini_output(gemini_raw_text, user_question)
-        
-    except APIError as e:
-        return f"A Gemini API error occurred: {e}"
-    except Exception as e:
-        return f"An unknown error occurred: {e}"
-
-
-# --- MAIN RAG CONTROL FLOW (STATEFUL MULTILINGUAL) ---
-
-def handle_user_query_rag(user_question, lang):
-    """Executes the RAG flow using the persistent language preference."""
-    query = user_question.lower().strip()
-    
-    # 1. Define localized messages based on lang
-    if lang == "hindi":
-        hello_message = "नमस्ते! मैं आपका **वित्तीय साक्षरता चैटबॉट** हूँ। मैं वित्तीय शब्द, बचत के सुझाव और घोटालों की चेतावनी में आपकी मदद कर सकता हूँ। आप क्या जानना चाहेंगे?"
-        vague_message = "मुझे खोजने के लिए एक स्पष्ट विषय चाहिए! कृपया उस शब्द को निर्दिष्ट करें जिसके बारे में आप अधिक जानकारी चाहते हैं।"
-        out_of_scope_message = "मैं एक **वित्तीय साक्षरता चैटबॉट** हूँ और मेरा ज्ञान मेरे डेटाबेस में विशिष्ट वित्तीय शब्दों, बचत युक्तियों और घोटाले की चेतावनियों तक ही सीमित है। मैं इस विषय में आपकी मदद नहीं कर सकता।"
-    else:
-        hello_message = "Hello! I'm your **Financial Literacy Chatbot**. I can help you with financial terms, saving tips, and scam alerts. What can I look up for you?"
-        vague_message = "I need a clearer topic to search! Since I can't remember our last conversation, please specify the term you want more information about (e.g., 'more on crypto scams' or 'next saving tip')."
-        out_of_scope_message = "I am a **Financial Literacy Chatbot** and my knowledge is limited to the specific financial terms, saving tips, and scam alerts in my database. I cannot help you with this topic."
-
-
-    # 2. TIGHTENED CONVERSATIONAL CHECK
-    short_greetings = ["hello", "hi", "hey", "howdy", "sup", "namaste", "namaskar"] 
-    if any(g in query for g in short_greetings) or query in ["thank you", "thanks", "bye", "goodbye", "cheers"] or \
-       query.startswith("how are you") or query.startswith("good morning") or query.startswith("good evening"):
-        return hello_message, "FinBot"
-
-    # 3. VAGUE QUERY CHECK 
-    vague_keywords = ["more", "next", "again", "tell me more"]
-    if query in vague_keywords or (len(query.split()) <= 2 and not is_query_financial(user_question)):
-        return vague_message, "FinBot"
-
-    # 4. MULTIPLE TIP REQUEST CHECK (Priority 1)
-    if "saving tip" in query or "tip" in query or "bachat" in query or "sujhav" in query:
-        count = 1
-        query_words = query.split()
-        number_map = {"two": 2, "three": 3, "four": 4, "5": 5, "five": 5, "multiple": 3, "several": 3, "many": 3, "do": 2, "teen": 3, "char": 4, "paanch": 5}
-        
-        for word in query_words:
-            if word in number_map:
-                count = number_map[word]
-                break
-            try:
-                if word.isdigit() and int(word) > 1:
-                    count = int(word)
-                    break
-            except ValueError:
-                pass
-
-        if count > 1:
-            return search_multiple_tips(count, lang), "FinBot"
-            
-    # 5. ATTEMPT SINGLE RETRIEVAL
-    primary_match = search_custom_data(user_question)
-
-    # 6. FALLBACK LOGIC
-    if not primary_match and is_query_financial(user_question):
-        # Pass the persistent language to Gemini
-        gemini_text = call_gemini_api_fallback(user_question, lang) 
-        
-        primary_match = {
-            'doc_type': 'Definition', 
-            'search_key': user_question, 
-            'content': gemini_text
-        }
-    
-    # 7. PROCESS PRIMARY MATCH
-    if primary_match:
-        if primary_match['doc_type'] == "Definition":
-            
-            # Pass the persistent language for related info retrieval
-            tip = retrieve_related_info("Saving Tip", lang) 
-            scam = retrieve_related_info("Scam Alert", lang) 
-            
-            # Localized headers
-            explained_header = "**📚 Financial Term Explained:**" if lang == "english" else "**📚 वित्तीय शब्द की व्याख्या:**"
-            tip_header = "\n***\n**💡 Related Saving Tip:**" if lang == "english" else "\n***\n**💡 संबंधित बचत सुझाव:**"
-            scam_header = "\n***\n**🚨 Financial Scam Alert:**" if lang == "english" else "\n***\n**🚨 वित्तीय घोटाला चेतावनी:**"
-
-            response_parts = []
-            
-            # A. Primary Definition 
-            definition_title = primary_match['search_key'].title() if primary_match['search_key'] == user_question else primary_match['search_key']
-            response_parts.append(f"{explained_header}\n**{definition_title}**:\n{primary_match['content']}")
-            
-            if tip:
-                # B. Saving Tip (Content is already localized)
-                response_parts.append(tip_header)
-                response_parts.append(f"**{tip['search_key']} ({tip['doc_type']}):**\n{tip['content']}")
-                
-            if scam:
-                # C. Scam Alert (Content is already localized)
-                response_parts.append(scam_header)
-                response_parts.append(f"**{scam['search_key']} ({scam['doc_type']}):**\n{scam['content']}")
-
-            return "\n".join(response_parts), "FinBot"
-        
-        # --- SINGLE RESULT FALLBACK (Tip/Scam from RAG) ---
-        else:
-            content_key = 'content_hindi' if lang == 'hindi' else 'content'
-            formatted_answer = f"**{primary_match['search_key']} ({primary_match['doc_type']}):**\n{primary_match.get(content_key, primary_match['content'])}"
-            return formatted_answer, "FinBot"
-
-    else:
-        # 7. OUT-OF-SCOPE
-        return out_of_scope_message, "FinBot"
-
-
-# --- INTERFACE ---
-
-def main():
-    """Runs the main chatbot interface loop."""
-    print("--- Financial Literacy Chatbot Initializing ---")
-    load_and_index_data()
-    
-    # NEW: Get initial language preference
-    get_language_preference()
-    
-    # Start the conversation loop
-    lang = SESSION_STATE['language'] # Get the chosen language
-    quit_message = "Goodbye!" if lang == "english" else "अलविदा!"
-    
-    while True:
-        # Use simple 'You: ' prompt for clean interaction
-        user_input = input(f"\nYou: ") 
-        
-        if user_input.lower() == 'quit':
-            print(quit_message)
-            break
-        
-        if not user_input.strip():
-            continue
-
-        # Pass the persistent language to the handler
-        response, source = handle_user_query_rag(user_input, lang) 
-        
-        print(f"\n{source}: {response}")
-
-if __name__ == "__main__":
+import os
+import json
+import re
+import string
+import asyncio
+import functools
+from dataclasses import dataclass
+from dotenv import load_dotenv
+import httpx
+import random
+
+# Import the Google GenAI library
+from google import genai
+from google.genai.errors import APIError
+
+# Optional accelerated keyword scoring. The bundled corpus is small (<100
+# docs), so the JIT import and compile cost usually outweighs the win; the
+# Numba kernel is only used when numba/numpy are installed AND USE_NUMBA is
+# flipped on for a corpus large enough to pay for it. The NumPy matrix scorer
+# likewise only activates past VECTOR_MIN_DOCS documents.
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = NUMPY_AVAILABLE
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+USE_NUMBA = False
+VECTOR_MIN_DOCS = 200
+
+# orjson parses dict-heavy payloads 2-5x faster than stdlib json; fall back
+# silently when it isn't installed since the load is a one-time startup cost.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Load environment variables (API Key)
+load_dotenv()
+
+# --- CONFIGURATION & CLIENT INITIALIZATION ---
+
+# Persistent HTTP/2 connection pool for the Gemini transport, so successive
+# fallback calls reuse one TLS connection instead of re-handshaking (~100ms).
+_HTTPX_CLIENT_ARGS = {
+    "http2": True,
+    "timeout": 30,
+    "limits": httpx.Limits(max_keepalive_connections=4, keepalive_expiry=300),
+}
+
+try:
+    # Initialize the real Gemini Client
+    GEMINI_CLIENT = genai.Client(
+        api_key=os.getenv("GEMINI_API_KEY"),
+        http_options=genai.types.HttpOptions(
+            client_args=_HTTPX_CLIENT_ARGS,
+            async_client_args=_HTTPX_CLIENT_ARGS,
+        ),
+    )
+except Exception:
+    print("FATAL ERROR: Could not initialize Gemini Client. Check your .env file and API key.")
+    class _MockAioModels:
+        async def generate_content(self, model, contents, config=None):
+            return type('MockResponse', (object,), {'text': "API ERROR: Client failed to initialize. Cannot answer."})
+        async def generate_content_stream(self, model, contents, config=None):
+            response = await self.generate_content(model, contents, config)
+            async def _stream():
+                yield response
+            return _stream()
+    class _MockAio:
+        models = _MockAioModels()
+    class MockGeminiClient:
+        aio = _MockAio()
+    GEMINI_CLIENT = MockGeminiClient()
+
+
+# --- GLOBAL DATA STRUCTURE & STATE ---
+SEARCHABLE_DOCUMENTS = []
+KEYWORD_INDEX = {}  # lowercased keyword/token -> list of doc indices (inverted index)
+TYPE_INDEX = {}     # doc_type -> list of doc indices
+DOCS_BY_TYPE = {}   # doc_type -> list of doc dicts
+DOCS_BY_TYPE_EN = {}  # per-language views with the localized content pre-selected
+DOCS_BY_TYPE_HI = {}
+_ACTIVE_VIEW = {}   # the session language's view; English until a choice is made
+KEYWORD_VOCAB = {}  # keyword -> uint32 id (only built when an accelerated scorer is usable)
+KW_FLAT = None      # flat uint32 array of all doc keyword ids (CSR layout)
+KW_OFFSETS = None   # uint32 offsets into KW_FLAT, one slice per doc
+KW_MATRIX = None    # uint8 doc-by-vocab indicator matrix (NumPy scorer only)
+TYPE_BONUS_SCAM = None  # per-doc bonus vectors for the NumPy scorer
+TYPE_BONUS_TIP = None
+TYPE_BONUS_DEF = None
+_MAX_MULTIWORD_KW = 0  # widest per-doc multi-word keyword count (scoring bound)
+SESSION_STATE = {}
+
+
+# --- NEW STATE & LANGUAGE SETUP ---
+
+def get_language_preference():
+    """Prompts the user for language choice and sets the session state."""
+    
+    print("\n--- Language Selection ---")
+    while True:
+        choice = input("Please choose your preferred language / अपनी पसंदीदा भाषा चुनें:\n[E] English\n[H] Hindi\n> ").lower().strip()
+        
+        if choice == 'e':
+            SESSION_STATE['language'] = 'english'
+            set_language_view('english')
+            print("---------------------------------------------")
+            print("Language set to English. Welcome! Ask me any financial term, saving tip, or scam alert. (Type 'quit' to exit)")
+            break
+        elif choice == 'h':
+            SESSION_STATE['language'] = 'hindi'
+            set_language_view('hindi')
+            print("---------------------------------------------")
+            print("भाषा हिंदी पर सेट कर दी गई है। स्वागत है! मुझसे कोई भी वित्तीय शब्द, बचत सुझाव या घोटाले की चेतावनी के बारे में पूछें। (बाहर निकलने के लिए 'quit' टाइप करें)")
+            break
+        else:
+            print("Invalid choice. Please enter 'E' or 'H'. / अमान्य विकल्प। कृपया 'E' या 'H' दर्ज करें।")
+
+# --- UTILITY FUNCTIONS ---
+# (Removed detect_language as it's no longer needed)
+
+@dataclass(frozen=True, slots=True)
+class QueryCtx:
+    """Precomputed views of a user query, built once per request so downstream
+    functions don't each re-lowercase and re-split the same string."""
+    raw: str
+    lc: str
+    tokens: frozenset
+
+
+def _normalize_token(token):
+    """Strips leading/trailing punctuation from a token ("smishing?" -> "smishing")."""
+    return token.strip(string.punctuation)
+
+
+def make_query_ctx(user_question):
+    """Builds a QueryCtx from the raw user input."""
+    lc = user_question.lower().strip()
+    # Tokens are matched by hash against the keyword sets and the inverted
+    # index, so keep both the raw and punctuation-stripped forms of each token
+    tokens = set(lc.split())
+    tokens.update(filter(None, map(_normalize_token, tuple(tokens))))
+    return QueryCtx(raw=user_question, lc=lc, tokens=frozenset(tokens))
+
+# Financial keyword lists compiled once into regex alternations, so each query
+# is checked with a single C-level scan instead of a Python loop per keyword.
+FINANCIAL_KEYWORDS = [
+    "account", "asset", "bank", "bond", "business", "capital", "cash", "credit",
+    "debt", "economy", "finance", "fund", "insurance", "invest", "loan", "market",
+    "money", "mortgage", "pay", "rate", "risk", "stock", "tax", "wealth",
+    "apr", "kyc", "cdo", "reit", "roth", "ira", "401k", "liability", "income", "expense", "investing", "crypto",
+    "scam", "scams", "tip", "tips", "define", "what is", "mlm", "blockchain",
+    "nifty", "sip", "ipo", "eps", "pe", "gdp", "cpi", "sensex", "nifty 50"
+]
+FINANCIAL_KEYWORDS_HINDI = ["बचत", "निवेश", "ऋण", "घोटाला", "वित्तीय", "टिप"]
+
+_FIN_RE_EN = re.compile(r'\b(?:' + '|'.join(map(re.escape, FINANCIAL_KEYWORDS)) + r')\b')
+_FIN_RE_HI = re.compile('|'.join(map(re.escape, FINANCIAL_KEYWORDS_HINDI)))
+
+def is_query_financial(user_question):
+    """
+    Simple heuristic to guess if a query is related to finance, business, or economics.
+    Accepts either a raw string or an already-built QueryCtx.
+    """
+    if isinstance(user_question, str):
+        user_question = make_query_ctx(user_question)
+    # Check both English and common Hindi keywords to cover all cases
+    return bool(_FIN_RE_EN.search(user_question.lc) or _FIN_RE_HI.search(user_question.raw))
+
+
+# Static LLM preambles, compiled once into a single anchored regex. Longer
+# preambles are sorted first so they win over their own prefixes (e.g.
+# "it stands for" before "stands for").
+_PREAMBLES_EN = ["it stands for", "stands for", "the definition is", "refers to", "is the"]
+_PREAMBLES_HI = ["इसका मतलब है", "परिभाषा यह है", "को संदर्भित करता है", "है"]
+_PREAMBLE_RE = re.compile(
+    r'^(?:' + '|'.join(map(re.escape, sorted(_PREAMBLES_EN + _PREAMBLES_HI, key=len, reverse=True))) + r')[:,.\-\s]*',
+    re.IGNORECASE
+)
+
+@functools.lru_cache(maxsize=512)
+def clean_gemini_output(text, query):
+    """Strips common LLM preambles to ensure only the core definition is returned.
+
+    Pure string-in/string-out, so results are memoized: re-issued queries that
+    hit the upstream response cache skip the preamble stripping too.
+    """
+    query_lower = query.lower()
+    cleaned_text = text.strip()
+
+    # Fast path for the dynamic, query-specific preambles. The text is
+    # lowercased exactly once, and the candidate strings (longest first) are
+    # only built when the text actually starts with the query.
+    lc = cleaned_text.lower()
+    if lc.startswith(query_lower):
+        for preamble in (f"{query_lower} stands for", f"{query_lower} is"):
+            if lc.startswith(preamble):
+                return cleaned_text[len(preamble):].strip(":,.- ")
+
+    # One anchored regex match replaces the per-preamble startswith loops
+    return _PREAMBLE_RE.sub('', cleaned_text, count=1).lstrip(':,.- ')
+
+
+def _clean_preamble_prefix(text, query):
+    """Prefix-only variant of clean_gemini_output for the streamed head.
+
+    The head usually ends mid-sentence, so only the leading preamble may be
+    removed; trailing whitespace and punctuation belong to the text that the
+    next chunk continues and must survive untouched.
+    """
+    query_lower = query.lower()
+    head = text.lstrip()
+    lc = head.lower()
+    if lc.startswith(query_lower):
+        for preamble in (f"{query_lower} stands for", f"{query_lower} is"):
+            if lc.startswith(preamble):
+                return head[len(preamble):].lstrip(":,.- ")
+    return _PREAMBLE_RE.sub('', head, count=1).lstrip(':,.- ')
+
+def load_and_index_data(file_path="financial_data.json"):
+    """Loads the JSON and flattens it into the SEARCHABLE_DOCUMENTS list, capturing both English and Hindi."""
+    global SEARCHABLE_DOCUMENTS
+    try:
+        # Read as bytes: both parsers decode UTF-8 themselves (Hindi support)
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    except FileNotFoundError:
+        print(f"Error: {file_path} not found. Please ensure it exists.")
+        return
+
+    # 1. Process Financial Terms (Definitions)
+    for item in data.get('financial_literacy_terms', []):
+        keywords = [item['question'].lower()] + [k.lower() for k in item.get('keywords', [])]
+        SEARCHABLE_DOCUMENTS.append({
+            "doc_type": "Definition",
+            "search_key": item['question'],
+            "content": item['response'],
+            "content_hindi": item.get('response_hindi', 'Translation not available.'),
+            "keywords": keywords,
+            "_search_key_lc": item['question'].lower(),
+            "_content_lc": item['response'].lower(),
+            "_keywords_set": frozenset(keywords),
+            "_multiword_keywords": tuple(kw for kw in frozenset(keywords) if ' ' in kw)
+        })
+
+    # 2. Process Saving Tips
+    for item in data.get('financial_advice', {}).get('saving_tips', []):
+        keywords_from_detail = [word.lower() for word in item['detail'].split() if len(word) > 3]
+        keywords = [item['tip'].lower()] + keywords_from_detail
+        tip_content = f"Tip: {item['detail']}"
+        SEARCHABLE_DOCUMENTS.append({
+            "doc_type": "Saving Tip",
+            "search_key": item['tip'],
+            "content": tip_content,
+            "content_hindi": f"सुझाव: {item.get('detail_hindi', 'अनुवाद उपलब्ध नहीं है।')}",
+            "keywords": keywords,
+            "_search_key_lc": item['tip'].lower(),
+            "_content_lc": tip_content.lower(),
+            "_keywords_set": frozenset(keywords),
+            "_multiword_keywords": tuple(kw for kw in frozenset(keywords) if ' ' in kw)
+        })
+        
+    # 3. Process Scam Alerts
+    for item in data.get('financial_advice', {}).get('scam_alerts', []):
+        scam_content = f"Warning: {item['warning_sign']} | Prevention: {item['prevention_tip']}"
+        scam_content_hindi = f"चेतावनी: {item.get('warning_sign_hindi', 'अनुवाद उपलब्ध नहीं है।')} | रोकथाम: {item.get('prevention_tip_hindi', 'अनुवाद उपलब्ध नहीं है।')}"
+        keywords_from_scam = [word.lower() for word in scam_content.split() if len(word) > 3]
+        keywords = [item['scam_name'].lower()] + keywords_from_scam
+        SEARCHABLE_DOCUMENTS.append({
+            "doc_type": "Scam Alert",
+            "search_key": item['scam_name'],
+            "content": scam_content,
+            "content_hindi": scam_content_hindi,
+            "keywords": keywords,
+            "_search_key_lc": item['scam_name'].lower(),
+            "_content_lc": scam_content.lower(),
+            "_keywords_set": frozenset(keywords),
+            "_multiword_keywords": tuple(kw for kw in frozenset(keywords) if ' ' in kw)
+        })
+
+    # 4. Build the inverted indexes so search only has to score candidate docs
+    global KEYWORD_INDEX, TYPE_INDEX, DOCS_BY_TYPE, _MAX_MULTIWORD_KW
+    KEYWORD_INDEX = {}
+    TYPE_INDEX = {}
+    _MAX_MULTIWORD_KW = max(
+        (len(d['_multiword_keywords']) for d in SEARCHABLE_DOCUMENTS), default=0
+    )
+    DOCS_BY_TYPE = {}
+
+    def index_token(token, i):
+        # Index the punctuation-stripped form alongside the raw one so
+        # normalized query tokens still find their posting list
+        KEYWORD_INDEX.setdefault(token, []).append(i)
+        stripped = _normalize_token(token)
+        if stripped and stripped != token:
+            KEYWORD_INDEX.setdefault(stripped, []).append(i)
+
+    for i, doc in enumerate(SEARCHABLE_DOCUMENTS):
+        DOCS_BY_TYPE.setdefault(doc['doc_type'], []).append(doc)
+        for kw in doc['keywords']:
+            KEYWORD_INDEX.setdefault(kw, []).append(i)
+            # Index word-level tokens of multi-word keywords too
+            for token in kw.split():
+                index_token(token, i)
+        for token in doc['search_key'].lower().split():
+            index_token(token, i)
+        TYPE_INDEX.setdefault(doc['doc_type'], []).append(i)
+
+    # Language is session-constant, so flatten each doc into small per-language
+    # records with the localized content already chosen; retrieval then needs
+    # no content-key selection per call
+    global DOCS_BY_TYPE_EN, DOCS_BY_TYPE_HI, _ACTIVE_VIEW
+    DOCS_BY_TYPE_EN = {}
+    DOCS_BY_TYPE_HI = {}
+    for doc_type, docs in DOCS_BY_TYPE.items():
+        DOCS_BY_TYPE_EN[doc_type] = [
+            {"search_key": d['search_key'], "doc_type": d['doc_type'], "content": d['content']}
+            for d in docs
+        ]
+        DOCS_BY_TYPE_HI[doc_type] = [
+            {"search_key": d['search_key'], "doc_type": d['doc_type'], "content": d.get('content_hindi', d['content'])}
+            for d in docs
+        ]
+    _ACTIVE_VIEW = DOCS_BY_TYPE_EN
+
+    # 5. Optionally pack keyword ids into a CSR layout for the accelerated scorers
+    n_docs = len(SEARCHABLE_DOCUMENTS)
+    use_matrix = NUMPY_AVAILABLE and n_docs > VECTOR_MIN_DOCS
+    if (USE_NUMBA and NUMBA_AVAILABLE) or use_matrix:
+        global KEYWORD_VOCAB, KW_FLAT, KW_OFFSETS
+        KEYWORD_VOCAB = {}
+        flat = []
+        offsets = [0]
+        for doc in SEARCHABLE_DOCUMENTS:
+            for kw in sorted(doc['_keywords_set']):
+                flat.append(KEYWORD_VOCAB.setdefault(kw, len(KEYWORD_VOCAB)))
+            offsets.append(len(flat))
+        KW_FLAT = np.asarray(flat, dtype=np.uint32)
+        KW_OFFSETS = np.asarray(offsets, dtype=np.uint32)
+
+    # 6. For larger corpora, expand the CSR arrays into a doc-by-vocab indicator
+    # matrix so keyword scoring becomes one matrix-vector product (SoA layout),
+    # plus per-doc bonus vectors for the doc_type rules
+    if use_matrix:
+        global KW_MATRIX, TYPE_BONUS_SCAM, TYPE_BONUS_TIP, TYPE_BONUS_DEF
+        KW_MATRIX = np.zeros((n_docs, len(KEYWORD_VOCAB)), dtype=np.uint8)
+        for d in range(n_docs):
+            KW_MATRIX[d, KW_FLAT[KW_OFFSETS[d]:KW_OFFSETS[d + 1]]] = 1
+        doc_types = [doc['doc_type'] for doc in SEARCHABLE_DOCUMENTS]
+        TYPE_BONUS_SCAM = np.asarray([1.5 if t == "Scam Alert" else 0.0 for t in doc_types], dtype=np.float32)
+        TYPE_BONUS_TIP = np.asarray([1.0 if t == "Saving Tip" else 0.0 for t in doc_types], dtype=np.float32)
+        TYPE_BONUS_DEF = np.asarray([0.5 if t == "Definition" else 0.0 for t in doc_types], dtype=np.float32)
+
+    # 7. Warm up the Numba kernel with a dummy query so the JIT compile (or the
+    # cache=True reload from disk) happens here at startup rather than on the
+    # first user query
+    if USE_NUMBA and NUMBA_AVAILABLE and KW_FLAT is not None:
+        _keyword_hit_counts(np.zeros(1, dtype=np.uint32), KW_FLAT, KW_OFFSETS)
+
+    print(f"Loaded {len(SEARCHABLE_DOCUMENTS)} searchable documents.")
+
+
+# --- MULTI-RETRIEVAL FUNCTIONS ---
+
+def set_language_view(lang):
+    """Selects the pre-flattened document view matching the session language."""
+    global _ACTIVE_VIEW
+    _ACTIVE_VIEW = DOCS_BY_TYPE_HI if lang == 'hindi' else DOCS_BY_TYPE_EN
+
+
+def retrieve_related_info(doc_type):
+    """Retrieves a single, random document of the specified type in the session language."""
+    docs = _ACTIVE_VIEW.get(doc_type)
+    if docs:
+        # The view records already carry the localized content
+        return random.choice(docs)
+    return None
+
+def search_multiple_tips(count, lang):
+    """Retrieves a specified number of unique Saving Tips in the session language."""
+    tips = _ACTIVE_VIEW.get("Saving Tip", [])
+    num_to_return = min(count, len(tips))
+    selected_tips = random.sample(tips, num_to_return)
+
+    if lang == "hindi":
+        header = f"यहाँ {num_to_return} लोकप्रिय बचत सुझाव दिए गए हैं:\n\n"
+    else:
+        header = f"Here are {num_to_return} popular Saving Tips:\n\n"
+
+    # Accumulate parts and join once (matches the response_parts pattern used
+    # in handle_user_query_rag) instead of quadratic string concatenation
+    parts = [header]
+    for i, doc in enumerate(selected_tips):
+        parts.append(f"{i+1}. **{doc['search_key']} ({doc['doc_type']}):**\n")
+        parts.append(f"   {doc['content']}\n\n")
+
+    return "".join(parts).strip()
+
+
+# --- RAG RETRIEVAL AND FALLBACK ---
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _keyword_hit_counts(query_ids, kw_flat, kw_offsets):
+        """Counts, per doc, how many of its keyword ids appear in query_ids."""
+        n_docs = kw_offsets.shape[0] - 1
+        counts = np.zeros(n_docs, dtype=np.uint32)
+        for d in range(n_docs):
+            c = 0
+            for j in range(kw_offsets[d], kw_offsets[d + 1]):
+                k = kw_flat[j]
+                for q in query_ids:
+                    if q == k:
+                        c += 1
+                        break
+            counts[d] = c
+        return counts
+
+
+def _query_keyword_ids(q_tokens):
+    """Maps query tokens to keyword vocabulary ids, dropping unknown tokens."""
+    return np.fromiter(
+        (KEYWORD_VOCAB[t] for t in q_tokens if t in KEYWORD_VOCAB),
+        dtype=np.uint32
+    )
+
+
+def search_custom_data(user_query):
+    """
+    Searches the local data structure for a matching answer. Returns the raw document dict.
+    Accepts either a raw string or an already-built QueryCtx.
+    """
+    if isinstance(user_query, str):
+        user_query = make_query_ctx(user_query)
+    query = user_query.lc
+    SCORE_THRESHOLD = 0.5
+    top_matches = []
+    highest_score = 0
+
+    # Candidate docs come from the inverted index; tokens were split once upstream
+    q_tokens = user_query.tokens
+    candidates = {i for t in q_tokens for i in KEYWORD_INDEX.get(t, ())}
+    if "scam" in query:
+        candidates.update(TYPE_INDEX.get("Scam Alert", ()))
+    if "tip" in query or "save" in query:
+        candidates.update(TYPE_INDEX.get("Saving Tip", ()))
+    if "what is" in query or "define" in query or "term" in query:
+        candidates.update(TYPE_INDEX.get("Definition", ()))
+
+    # Vectorized path: one matrix-vector product scores every doc's keyword
+    # overlap at once, with the doc_type bonuses added as precomputed vectors.
+    # Only the candidate docs can earn the substring bonuses, mirroring the
+    # scalar loop below.
+    if KW_MATRIX is not None:
+        q_vec = np.zeros(len(KEYWORD_VOCAB), dtype=np.uint8)
+        for t in q_tokens:
+            kw_id = KEYWORD_VOCAB.get(t)
+            if kw_id is not None:
+                q_vec[kw_id] = 1
+        scores = 0.5 * (KW_MATRIX @ q_vec).astype(np.float32)
+        if "scam" in query:
+            scores += TYPE_BONUS_SCAM
+        if "tip" in query or "save" in query:
+            scores += TYPE_BONUS_TIP
+        if "what is" in query or "define" in query or "term" in query:
+            scores += TYPE_BONUS_DEF
+        for i in candidates:
+            doc = SEARCHABLE_DOCUMENTS[i]
+            if doc['_search_key_lc'] in query:
+                scores[i] += 1.0
+            if query in doc['_content_lc']:
+                scores[i] += 0.4
+            for kw in doc['_multiword_keywords']:
+                if kw in query:
+                    scores[i] += 0.5
+        highest = float(scores.max()) if len(scores) else 0.0
+        if highest >= SCORE_THRESHOLD:
+            return SEARCHABLE_DOCUMENTS[random.choice(np.flatnonzero(scores == highest))]
+        return None
+
+    # When the Numba kernel is active, compute all keyword-hit counts in one
+    # compiled pass over the CSR arrays; otherwise fall back to per-doc sets.
+    kw_counts = None
+    if USE_NUMBA and KW_FLAT is not None:
+        kw_counts = _keyword_hit_counts(_query_keyword_ids(q_tokens), KW_FLAT, KW_OFFSETS)
+
+    # Tight upper bound on the score any doc can reach for this query: the best
+    # applicable type bonus, the search_key and content bonuses, one keyword
+    # hit per query token, and every multi-word keyword the widest doc carries.
+    # Once a doc reaches it, no later doc can win.
+    if "scam" in query:
+        max_type_bonus = 1.5
+    elif "tip" in query or "save" in query:
+        max_type_bonus = 1.0
+    elif "what is" in query or "define" in query or "term" in query:
+        max_type_bonus = 0.5
+    else:
+        max_type_bonus = 0
+    max_possible = max_type_bonus + 1.0 + 0.5 * (len(q_tokens) + _MAX_MULTIWORD_KW) + 0.4
+
+    for i in candidates:
+        doc = SEARCHABLE_DOCUMENTS[i]
+        score = 0
+        
+        if "scam" in query and doc['doc_type'] == "Scam Alert":
+            score += 1.5 
+        elif ("tip" in query or "save" in query) and doc['doc_type'] == "Saving Tip":
+            score += 1.0 
+        elif ("what is" in query or "define" in query or "term" in query) and doc['doc_type'] == "Definition":
+            score += 0.5 
+            
+        if doc['_search_key_lc'] in query:
+            score += 1.0
+
+        # Hashed set intersection replaces the per-keyword substring loop for
+        # single-word keywords; multi-word keywords (a handful per doc, e.g.
+        # the full lowercased title) still need the substring check since they
+        # can never equal a single query token
+        if kw_counts is not None:
+            score += 0.5 * int(kw_counts[i])
+        else:
+            score += 0.5 * len(doc['_keywords_set'].intersection(q_tokens))
+        for kw in doc['_multiword_keywords']:
+            if kw in query:
+                score += 0.5
+
+        if query in doc['_content_lc']:
+             score += 0.4
+        
+        if score > highest_score:
+            highest_score = score
+            top_matches = [doc]
+            if highest_score >= max_possible:
+                break
+        elif score == highest_score and score >= SCORE_THRESHOLD:
+            top_matches.append(doc)
+
+    if highest_score >= SCORE_THRESHOLD and top_matches:
+        return random.choice(top_matches) 
+    else:
+        return None 
+
+# Manual result cache for the async fallback: lru_cache cannot wrap a
+# coroutine function (it would cache one-shot coroutine objects), so cached
+# text is stored in a bounded dict with oldest-first eviction instead.
+_GEMINI_CACHE = {}
+_GEMINI_CACHE_MAXSIZE = 256
+
+async def call_gemini_api_fallback(user_question, lang, stream=False):
+    """Calls the Gemini API if local search fails, requesting the definition in the correct language.
+
+    With stream=True, tokens are printed to stdout as they arrive so the user
+    sees output immediately instead of waiting for the full completion; the
+    cleaned full text is still returned (and cached) for response assembly.
+
+    Results are cached per (question, lang) since the system prompt is deterministic
+    per-language, so retyping the same question skips the network round trip.
+    """
+    cache_key = (user_question, lang)
+    if cache_key in _GEMINI_CACHE:
+        cached = _GEMINI_CACHE[cache_key]
+        if stream:
+            print(cached, end='', flush=True)
+        return cached
+
+    if lang == "hindi":
+         system_instruction = (
+            "You are an expert, helpful financial assistant. The user is asking for a definition of a financial term. "
+            "Respond with a clean, concise definition or explanation in **Hindi (Devanagari script)**. "
+            "Do not include any introductory phrases like 'इसका मतलब है' or 'परिभाषा यह है'."
+        )
+    else:
+        system_instruction = (
+            "You are an expert, helpful financial assistant. The user is asking for a definition of a financial term or acronym. "
+            "Respond with ONLY the clean, concise definition or explanation, without any introductory phrases like 'It stands for...' or 'The definition is...'. "
+            "Start your response directly with the term's meaning."
+        )
+
+    try:
+        config = genai.types.GenerateContentConfig(system_instruction=system_instruction)
+        if stream:
+            # The preambles are anchored to the start of the reply, so hold the
+            # first chunks until the preamble region has definitely passed,
+            # clean that head once, then let later chunks stream straight
+            # through. What gets printed is exactly what gets cached, so a
+            # repeat of the same question renders identically.
+            hold_len = len(user_question) + max(len(p) for p in _PREAMBLES_EN) + 8
+            printed = []
+            pending = []
+            pending_len = 0
+
+            def _flush_pending():
+                head = _clean_preamble_prefix(''.join(pending), user_question)
+                print(head, end='', flush=True)
+                printed.append(head)
+
+            response_stream = await GEMINI_CLIENT.aio.models.generate_content_stream(
+                model="gemini-2.5-flash",
+                contents=[user_question],
+                config=config
+            )
+            async for chunk in response_stream:
+                if not chunk.text:
+                    continue
+                if pending is None:
+                    print(chunk.text, end='', flush=True)
+                    printed.append(chunk.text)
+                else:
+                    pending.append(chunk.text)
+                    pending_len += len(chunk.text)
+                    if pending_len >= hold_len:
+                        _flush_pending()
+                        pending = None
+            if pending is not None:
+                _flush_pending()
+            cleaned = ''.join(printed)
+        else:
+            response = await GEMINI_CLIENT.aio.models.generate_content(
+                model="gemini-2.5-flash",
+                contents=[user_question],
+                config=config
+            )
+            cleaned = clean_gemini_output(response.text, user_question)
+
+    except APIError as e:
+        message = f"A Gemini API error occurred: {e}"
+        if stream:
+            # In stream mode this function owns stdout; print the error so the
+            # caller's streamed branch doesn't render an empty definition
+            print(message, end='', flush=True)
+        return message
+    except Exception as e:
+        message = f"An unknown error occurred: {e}"
+        if stream:
+            print(message, end='', flush=True)
+        return message
+
+    if len(_GEMINI_CACHE) >= _GEMINI_CACHE_MAXSIZE:
+        _GEMINI_CACHE.pop(next(iter(_GEMINI_CACHE)))
+    _GEMINI_CACHE[cache_key] = cleaned
+    return cleaned
+
+
+async def call_gemini_api_batched(user_question, lang):
+    """
+    Single Gemini call covering every LLM-generated section at once. Instead of
+    one round trip per field, the model is asked for a JSON object with
+    'definition', 'tip' and 'scam_alert' keys; used when the local corpus cannot
+    supply the tip/scam sections. Falls back to the single-field call if the
+    response violates the schema.
+    """
+    if lang == "hindi":
+        system_instruction = (
+            "You are an expert, helpful financial assistant. The user is asking about a financial term. "
+            "Respond in **Hindi (Devanagari script)** with a JSON object containing three keys: "
+            "'definition' (a clean, concise definition of the term, no introductory phrases), "
+            "'tip' (one practical saving tip related to the term), and "
+            "'scam_alert' (one warning about a scam related to the term)."
+        )
+    else:
+        system_instruction = (
+            "You are an expert, helpful financial assistant. The user is asking about a financial term. "
+            "Respond with a JSON object containing three keys: "
+            "'definition' (ONLY the clean, concise definition, no introductory phrases), "
+            "'tip' (one practical saving tip related to the term), and "
+            "'scam_alert' (one warning about a scam related to the term)."
+        )
+
+    try:
+        response = await GEMINI_CLIENT.aio.models.generate_content(
+            model="gemini-2.5-flash",
+            contents=[user_question],
+            config=genai.types.GenerateContentConfig(
+                system_instruction=system_instruction,
+                response_mime_type="application/json",
+                response_schema={
+                    "type": "OBJECT",
+                    "properties": {
+                        "definition": {"type": "STRING"},
+                        "tip": {"type": "STRING"},
+                        "scam_alert": {"type": "STRING"},
+                    },
+                    "required": ["definition"],
+                },
+            )
+        )
+        parsed = json.loads(response.text)
+        parsed['definition'] = clean_gemini_output(parsed.get('definition', ''), user_question)
+        return parsed
+
+    except Exception:
+        # Schema violation, API failure, or transport error: degrade to
+        # single-field mode. This path only runs when a corpus section is
+        # empty, so there is no local content to fall back on and no exception
+        # may escape to the chat loop.
+        return {"definition": await call_gemini_api_fallback(user_question, lang)}
+
+
+# --- MAIN RAG CONTROL FLOW (STATEFUL MULTILINGUAL) ---
+
+# Localized UI strings built once at import; handlers grab one language table
+# per call instead of re-creating every message inside an if/else.
+_MESSAGES = {
+    "english": {
+        "hello": "Hello! I'm your **Financial Literacy Chatbot**. I can help you with financial terms, saving tips, and scam alerts. What can I look up for you?",
+        "vague": "I need a clearer topic to search! Since I can't remember our last conversation, please specify the term you want more information about (e.g., 'more on crypto scams' or 'next saving tip').",
+        "oos": "I am a **Financial Literacy Chatbot** and my knowledge is limited to the specific financial terms, saving tips, and scam alerts in my database. I cannot help you with this topic.",
+        "explained_hdr": "**📚 Financial Term Explained:**",
+        "tip_hdr": "\n***\n**💡 Related Saving Tip:**",
+        "scam_hdr": "\n***\n**🚨 Financial Scam Alert:**",
+    },
+    "hindi": {
+        "hello": "नमस्ते! मैं आपका **वित्तीय साक्षरता चैटबॉट** हूँ। मैं वित्तीय शब्द, बचत के सुझाव और घोटालों की चेतावनी में आपकी मदद कर सकता हूँ। आप क्या जानना चाहेंगे?",
+        "vague": "मुझे खोजने के लिए एक स्पष्ट विषय चाहिए! कृपया उस शब्द को निर्दिष्ट करें जिसके बारे में आप अधिक जानकारी चाहते हैं।",
+        "oos": "मैं एक **वित्तीय साक्षरता चैटबॉट** हूँ और मेरा ज्ञान मेरे डेटाबेस में विशिष्ट वित्तीय शब्दों, बचत युक्तियों और घोटाले की चेतावनियों तक ही सीमित है। मैं इस विषय में आपकी मदद नहीं कर सकता।",
+        "explained_hdr": "**📚 वित्तीय शब्द की व्याख्या:**",
+        "tip_hdr": "\n***\n**💡 संबंधित बचत सुझाव:**",
+        "scam_hdr": "\n***\n**🚨 वित्तीय घोटाला चेतावनी:**",
+    },
+}
+
+# Greeting/farewell and vague-query tokens, hoisted so classification does O(1)
+# set membership and one compiled prefix match instead of per-query list scans.
+_SHORT_GREETINGS = ("hello", "hi", "hey", "howdy", "sup", "namaste", "namaskar")
+_GREETING_EXACT = frozenset(_SHORT_GREETINGS) | frozenset({"thank you", "thanks", "bye", "goodbye", "cheers"})
+_GREETING_PREFIX_RE = re.compile(r'^(?:how are you|good morning|good evening)\b')
+_VAGUE_KEYWORDS = frozenset({"more", "next", "again", "tell me more"})
+
+
+@functools.lru_cache(maxsize=1024)
+def _classify_and_retrieve(query, lang):
+    """
+    Deterministic classification of a lowercased query. Returns an (action, payload)
+    tuple: ('answer', text) for a fixed response, ('tips', count) for a multi-tip
+    request, or ('search', None) when RAG retrieval is needed. The randomized
+    assembly (random tip/scam/sample choices) stays outside this cache so repeat
+    queries still get varied responses.
+    """
+    # 1. Look up the localized message table once
+    m = _MESSAGES[lang] if lang in _MESSAGES else _MESSAGES["english"]
+    hello_message = m["hello"]
+    vague_message = m["vague"]
+
+    # 2. TIGHTENED CONVERSATIONAL CHECK: exact-match fast path first, then the
+    # prefix pattern, with the substring scan only for phrases like "hello there"
+    if query in _GREETING_EXACT or _GREETING_PREFIX_RE.match(query) or \
+       any(g in query for g in _SHORT_GREETINGS):
+        return "answer", hello_message
+
+    # 3. VAGUE QUERY CHECK
+    if query in _VAGUE_KEYWORDS or (len(query.split()) <= 2 and not is_query_financial(query)):
+        return "answer", vague_message
+
+    # 4. MULTIPLE TIP REQUEST CHECK (Priority 1)
+    if "saving tip" in query or "tip" in query or "bachat" in query or "sujhav" in query:
+        count = 1
+        query_words = query.split()
+        number_map = {"two": 2, "three": 3, "four": 4, "5": 5, "five": 5, "multiple": 3, "several": 3, "many": 3, "do": 2, "teen": 3, "char": 4, "paanch": 5}
+
+        for word in query_words:
+            if word in number_map:
+                count = number_map[word]
+                break
+            try:
+                if word.isdigit() and int(word) > 1:
+                    count = int(word)
+                    break
+            except ValueError:
+                pass
+
+        if count > 1:
+            return "tips", count
+
+    return "search", None
+
+
+async def handle_user_query_rag(user_question, lang):
+    """Executes the RAG flow using the persistent language preference."""
+    qctx = make_query_ctx(user_question)
+    query = qctx.lc
+
+    m = _MESSAGES[lang] if lang in _MESSAGES else _MESSAGES["english"]
+    out_of_scope_message = m["oos"]
+
+    # 2-4. CACHED DETERMINISTIC CLASSIFICATION (greetings, vague queries, tip counts)
+    action, payload = _classify_and_retrieve(query, lang)
+    if action == "answer":
+        return payload, "FinBot"
+    if action == "tips":
+        return search_multiple_tips(payload, lang), "FinBot"
+
+    # 5. ATTEMPT SINGLE RETRIEVAL
+    primary_match = search_custom_data(qctx)
+
+    # 6. FALLBACK LOGIC
+    tip = scam = None
+    prefetched = False
+    streamed = False
+    if not primary_match and is_query_financial(qctx):
+        if DOCS_BY_TYPE.get("Saving Tip") and DOCS_BY_TYPE.get("Scam Alert"):
+            # Print the header up front, then stream definition tokens to
+            # stdout as they arrive while the local retrievals run alongside
+            print(f"\nFinBot: {m['explained_hdr']}\n**{user_question.title()}**:")
+            gemini_text, tip, scam = await asyncio.gather(
+                call_gemini_api_fallback(query, lang, stream=True),
+                asyncio.to_thread(retrieve_related_info, "Saving Tip"),
+                asyncio.to_thread(retrieve_related_info, "Scam Alert"),
+            )
+            print(flush=True)  # terminate the streamed definition line
+            streamed = True
+        else:
+            # Local corpus cannot supply tip/scam sections: one batched JSON
+            # call fetches definition plus the missing pieces in a single trip
+            batched = await call_gemini_api_batched(query, lang)
+            gemini_text = batched.get('definition', '')
+            tip = retrieve_related_info("Saving Tip")
+            scam = retrieve_related_info("Scam Alert")
+            if tip is None and batched.get('tip'):
+                tip = {'search_key': 'From Gemini', 'doc_type': 'Saving Tip', 'content': batched['tip']}
+            if scam is None and batched.get('scam_alert'):
+                scam = {'search_key': 'From Gemini', 'doc_type': 'Scam Alert', 'content': batched['scam_alert']}
+        prefetched = True
+
+        primary_match = {
+            'doc_type': 'Definition',
+            'search_key': user_question,
+            'content': gemini_text
+        }
+
+    # 7. PROCESS PRIMARY MATCH
+    if primary_match:
+        if primary_match['doc_type'] == "Definition":
+
+            # Pass the persistent language for related info retrieval
+            if not prefetched:
+                tip = retrieve_related_info("Saving Tip")
+                scam = retrieve_related_info("Scam Alert")
+            
+            # Localized headers
+            explained_header = m["explained_hdr"]
+            tip_header = m["tip_hdr"]
+            scam_header = m["scam_hdr"]
+
+            response_parts = []
+            
+            # A. Primary Definition 
+            definition_title = primary_match['search_key'].title() if primary_match['search_key'] == user_question else primary_match['search_key']
+            response_parts.append(f"{explained_header}\n**{definition_title}**:\n{primary_match['content']}")
+            
+            if tip:
+                # B. Saving Tip (Content is already localized)
+                response_parts.append(tip_header)
+                response_parts.append(f"**{tip['search_key']} ({tip['doc_type']}):**\n{tip['content']}")
+                
+            if scam:
+                # C. Scam Alert (Content is already localized)
+                response_parts.append(scam_header)
+                response_parts.append(f"**{scam['search_key']} ({scam['doc_type']}):**\n{scam['content']}")
+
+            if streamed:
+                # Header and definition already went to stdout while streaming;
+                # emit just the related sections and tell the caller not to print
+                remainder = "\n".join(response_parts[1:])
+                if remainder:
+                    print(remainder)
+                return None, "FinBot"
+
+            return "\n".join(response_parts), "FinBot"
+        
+        # --- SINGLE RESULT FALLBACK (Tip/Scam from RAG) ---
+        else:
+            content_key = 'content_hindi' if lang == 'hindi' else 'content'
+            formatted_answer = f"**{primary_match['search_key']} ({primary_match['doc_type']}):**\n{primary_match.get(content_key, primary_match['content'])}"
+            return formatted_answer, "FinBot"
+
+    else:
+        # 7. OUT-OF-SCOPE
+        return out_of_scope_message, "FinBot"
+
+
+# --- INTERFACE ---
+
+async def amain():
+    """Runs the main chatbot interface loop on a single-threaded event loop."""
+    print("--- Financial Literacy Chatbot Initializing ---")
+    load_and_index_data()
+
+    # NEW: Get initial language preference
+    get_language_preference()
+
+    # Start the conversation loop
+    lang = SESSION_STATE['language'] # Get the chosen language
+    quit_message = "Goodbye!" if lang == "english" else "अलविदा!"
+
+    while True:
+        # Use simple 'You: ' prompt for clean interaction
+        user_input = input(f"\nYou: ")
+
+        if user_input.lower() == 'quit':
+            print(quit_message)
+            break
+
+        if not user_input.strip():
+            continue
+
+        # Pass the persistent language to the handler. A None response means
+        # the handler already streamed its output to stdout.
+        response, source = await handle_user_query_rag(user_input, lang)
+
+        if response is not None:
+            print(f"\n{source}: {response}")
+
+def main():
+    """Entry point: drives the async interface loop."""
+    asyncio.run(amain())
+
+if __name__ == "__main__":
     main()
\ No newline at end of file